@@ -48,6 +48,7 @@ else:
     from . import stk_utils, stk_panel, stk_material, stk_kart, stk_track
 
 import bpy, bpy_extras, os
+from bpy.utils import register_class, unregister_class
 
 def menu_func_export_stk_material(self, context):
     self.layout.operator(stk_material.STK_Material_Export_Operator.bl_idname, text="STK Materials")
@@ -79,7 +80,6 @@ classes = (
 )
 
 def register():
-    from bpy.utils import register_class
     for cls in classes:
         register_class(cls)
 
@@ -94,9 +94,10 @@ def unregister():
     bpy.types.TOPBAR_MT_file_export.remove(menu_func_export_stk_kart)
     bpy.types.TOPBAR_MT_file_export.remove(menu_func_export_stk_track)
 
-    from bpy.utils import unregister_class
     for cls in classes:
-        unregister_class(cls)
+        # Skip classes whose registration failed or was already undone
+        if cls.is_registered:
+            unregister_class(cls)
 
 if __name__ == "__main__":
     register()
@@ -34,7 +34,6 @@
 
 import bpy, re
 from bpy_extras.io_utils import ExportHelper
-from collections import OrderedDict
 
 from bpy.props import (StringProperty,
                    BoolProperty,
@@ -79,9 +78,10 @@ def get_root_shader(node_network):
         # We check if it's a material output
         if node.bl_static_type == "OUTPUT_MATERIAL":
             # The surface should be linked
-            if node.inputs["Surface"].is_linked:
+            surface = node.inputs["Surface"]
+            if surface.is_linked:
                 # and the surface should be linked to a stk shader
-                child = node.inputs["Surface"].links[0].from_node
+                child = surface.links[0].from_node
                 if is_stk_shader(child):
                     return child
 
@@ -116,11 +116,15 @@ class ANTARCTICA_PT_properties(Panel, stk_panel.PanelBase):
             else:
                 row.label(text="(Material is not node-based)")
 
-            properties = OrderedDict([])
-            for curr in stk_panel.STK_MATERIAL_PROPERTIES[1]:
-                properties[curr.id] = curr
+            self.recursivelyAddProperties(stk_panel.STK_MATERIAL_PROPS_BY_ID, layout, obj, stk_panel.CONTEXT_MATERIAL)
 
-            self.recursivelyAddProperties(properties, layout, obj, stk_panel.CONTEXT_MATERIAL)
+# Sound effect attributes understood by STK (material properties prefixed with 'sfx_')
+SFX_ATTRIBUTES = frozenset(('filename', 'rolloff', 'min_speed', 'max_speed', 'min_pitch', 'max_pitch', 'positional', 'volume'))
+
+# Attributes that may already be present in a material's parameter line and get
+# overridden by the node tree
+UV_TWO_TEX_ATTR_RE = re.compile(r'uv-two-tex="[^"]*"')
+SHADER_ATTR_RE = re.compile(r'shader="[^"]*"')
 
 # Writes the materials files, which includes all texture definitions
 # Items are accessed by nodes, instead of being accessed directly
@@ -214,10 +218,7 @@ def writeMaterialsFile(self, sPath):
 
             # Create a copy of the list of defaults so that it can be modified. Then add
             # all properties of the current image
-            props_copy = []
-            for sAttrib in mat.keys():
-                if sAttrib not in props_copy:
-                    props_copy.append( (sAttrib, mat[sAttrib]) )
+            props_copy = list(mat.items())
 
             for AProperty,ADefault in props_copy:
                 # Don't add the (default) values to the property list
@@ -226,32 +227,35 @@ def writeMaterialsFile(self, sPath):
                 if AProperty in mat_dic and mat_dic[AProperty]['type'] == 'bool':
                     currentValue = stk_utils.convertTextToYN(currentValue)
 
+                sName = AProperty.strip()
+                sNameUpper = sName.upper()
+
                 # These items pertain to the soundeffects (starting with sfx_)
-                if AProperty.strip().startswith("sfx_"):
-                    strippedName = AProperty.strip()[len("sfx_"):]
+                if sName.startswith("sfx_"):
+                    strippedName = sName[len("sfx_"):]
 
-                    if strippedName in ['filename', 'rolloff', 'min_speed', 'max_speed', 'min_pitch', 'max_pitch', 'positional', 'volume']:
+                    if strippedName in SFX_ATTRIBUTES:
                         if isinstance(currentValue, float):
                             sSFX = "%s %s=\"%.2f\""%(sSFX,strippedName,currentValue)
                         else:
                             sSFX = "%s %s=\"%s\""%(sSFX,strippedName,currentValue)
-                elif AProperty.strip().upper().startswith("PARTICLE_"):
+                elif sNameUpper.startswith("PARTICLE_"):
                     #These items pertain to the particles (starting with particle_)
-                    strippedName = AProperty.strip()[len("PARTICLE_"):]
+                    strippedName = sName[len("PARTICLE_"):]
                     sParticle = "%s %s=\"%s\""%(sParticle,strippedName,currentValue)
-                elif AProperty.strip().upper().startswith("ZIPPER_"):
+                elif sNameUpper.startswith("ZIPPER_"):
                     #These items pertain to the zippers (starting with zipper_)
-                    strippedName = AProperty.strip()[len("ZIPPER_"):]
+                    strippedName = sName[len("ZIPPER_"):]
 
                     sZipper = "%s %s=\"%s\""%(sZipper,strippedName.replace('_', '-'),currentValue)
                 else:
                     # These items are standard items
-                    prop = AProperty.strip()#.lower()
+                    prop_def = mat_dic.get(sName)
 
-                    if prop in mat_dic.keys():
+                    if prop_def is not None:
 
                         # If this property is conditional on another
-                        cond = mat_dic[prop]['parent']
+                        cond = prop_def['parent']
 
                         conditionPassed = False
                         if cond is None:
@@ -262,7 +266,7 @@ def writeMaterialsFile(self, sPath):
                         elif cond in mat and mat[cond] == "true":
                             conditionPassed = True
 
-                        if currentValue != mat_dic[prop]['default'] and conditionPassed:
+                        if currentValue != prop_def['default'] and conditionPassed:
                             fixed_property = AProperty
                             if AProperty == 'shader_name':
                                 fixed_property = 'shader'
@@ -303,13 +307,13 @@ def writeMaterialsFile(self, sPath):
                                 if type(uvTwo) is bpy.types.ShaderNodeTexImage:
                                     if "uv_two_tex" not in mat_dic.keys():
                                         if "uv-two-tex" in paramLine:
-                                            re.sub("uv-two-tex=\".*\"", "uv-two-tex=" + uvTwo.image.name, paramLine)
+                                            paramLine = UV_TWO_TEX_ATTR_RE.sub(lambda m: 'uv-two-tex="' + uvTwo.image.name + '"', paramLine)
                                         else:
                                             paramLine += " uv-two-tex=" + uvTwo.image.name
 
                                     if "shader" not in mat_dic.keys():
                                         if "shader" in paramLine:
-                                            re.sub("shader=\".*\"", "shader=\"decal\"")
+                                            paramLine = SHADER_ATTR_RE.sub('shader="decal"', paramLine)
                                         else:
                                             paramLine += " shader=\"decal\""
                             else:
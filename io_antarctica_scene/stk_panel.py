@@ -21,7 +21,6 @@
 # SOFTWARE.
 
 import bpy, os
-from collections import OrderedDict
 from bpy.types import Operator, AddonPreferences
 from bpy.props import StringProperty, IntProperty, BoolProperty
 from . import stk_utils
@@ -32,6 +31,12 @@ CONTEXT_MATERIAL  = 2
 
 datapath = stk_utils.getDataPath(os.path.dirname(__file__))
 
+# Add-on module name, used as the key of its preferences
+_ADDON_ID = os.path.basename(os.path.dirname(__file__))
+
+def _getAddonPreferences(context):
+    return context.preferences.addons[_ADDON_ID].preferences
+
 SCENE_PROPS = []
 STK_PER_OBJECT_TRACK_PROPERTIES = []
 STK_PER_OBJECT_KART_PROPERTIES = []
@@ -62,6 +67,16 @@ if os.path.exists(datapath):
 else:
     raise RuntimeError("(STK) Make sure the stkdata folder is installed, cannot locate it!!")
 
+# Top-level properties indexed by id, as expected by recursivelyAddProperties
+# and createProperties
+SCENE_PROPS_BY_ID = {prop.id: prop for prop in SCENE_PROPS[1]}
+STK_TRACK_PROPS_BY_ID = {prop.id: prop for prop in STK_PER_OBJECT_TRACK_PROPERTIES[1]}
+STK_KART_PROPS_BY_ID = {prop.id: prop for prop in STK_PER_OBJECT_KART_PROPERTIES[1]}
+STK_MATERIAL_PROPS_BY_ID = {prop.id: prop for prop in STK_MATERIAL_PROPERTIES[1]}
+
+# Per-object track properties indexed by their user-visible name
+STK_TRACK_PROPS_BY_NAME = {prop.name: prop for prop in STK_PER_OBJECT_TRACK_PROPERTIES[1]}
+
 class STK_TypeUnset(bpy.types.Operator):
     bl_idname = ("screen.stk_unset_type")
     bl_label = ("STK Object :: unset type")
@@ -77,23 +92,14 @@ class STK_MissingProps_Object(bpy.types.Operator):
 
     def execute(self, context):
 
-        is_track = ("is_stk_track" in context.scene and context.scene["is_stk_track"] == "true")
-        is_node = ("is_stk_node" in context.scene and context.scene["is_stk_node"] == "true")
-        is_kart = ("is_stk_kart" in context.scene and context.scene["is_stk_kart"] == "true")
+        is_track, is_node, is_kart = stk_utils.getSceneFlags(context.scene)
 
         obj = context.object
 
         if is_kart:
-            properties = OrderedDict([])
-            for curr in STK_PER_OBJECT_KART_PROPERTIES[1]:
-                properties[curr.id] = curr
-            stk_utils.createProperties(obj, properties)
+            stk_utils.createProperties(obj, STK_KART_PROPS_BY_ID)
         elif is_track or is_node:
-            properties = OrderedDict([])
-            for curr in STK_PER_OBJECT_TRACK_PROPERTIES[1]:
-                properties[curr.id] = curr
-            print('creating', properties, 'on', obj.name)
-            stk_utils.createProperties(obj, properties)
+            stk_utils.createProperties(obj, STK_TRACK_PROPS_BY_ID)
 
         return {'FINISHED'}
 
@@ -103,10 +109,7 @@ class STK_MissingProps_Scene(bpy.types.Operator):
 
     def execute(self, context):
         scene = context.scene
-        properties = OrderedDict([])
-        for curr in SCENE_PROPS[1]:
-            properties[curr.id] = curr
-        stk_utils.createProperties(scene, properties)
+        stk_utils.createProperties(scene, SCENE_PROPS_BY_ID)
         return {'FINISHED'}
 
 class STK_MissingProps_Material(bpy.types.Operator):
@@ -114,15 +117,13 @@ class STK_MissingProps_Material(bpy.types.Operator):
     bl_label = ("Create missing properties")
 
     def execute(self, context):
-        material = getObject(context, CONTEXT_MATERIAL)
-        properties = OrderedDict([])
-        for curr in STK_MATERIAL_PROPERTIES[1]:
-            properties[curr.id] = curr
-        stk_utils.createProperties(material, properties)
+        material = stk_utils.getObject(context, CONTEXT_MATERIAL)
+        stk_utils.createProperties(material, STK_MATERIAL_PROPS_BY_ID)
         return {'FINISHED'}
 
 # ==== PANEL BASE ====
 class PanelBase:
+    __slots__ = ()
 
     def recursivelyAddProperties(self, properties, layout, obj, contextLevel):
 
@@ -131,111 +132,128 @@ class PanelBase:
 
             row = layout.row()
 
-            if isinstance(curr, stk_utils.StkPropertyGroup):
+            handler = _HANDLERS.get(type(curr), PanelBase._draw_default)
+            handler(self, curr, row, layout, obj, contextLevel)
+
+    def _draw_group(self, curr, row, layout, obj, contextLevel):
+
+        # Groups are expanded unless the first scene says otherwise
+        state = bpy.data.scenes[0].get(curr.id, "true")
+        if state == "true":
+            icon = 'TRIA_DOWN'
+        else:
+            icon = 'TRIA_RIGHT'
+
+        row.operator(curr.op_tglbool, text=curr.name, icon=icon, emboss=False)
+        row.label(text=" ") # force the operator to not maximize
+        # Collapsed groups only draw their header row
+        if state != "true" or len(curr.subproperties) == 0:
+            return
+
+        box = layout.box()
+        self.recursivelyAddProperties(curr.subproperties, box, obj, contextLevel)
+
+    def _draw_bool(self, curr, row, layout, obj, contextLevel):
 
-                state = "true"
-                icon = 'TRIA_DOWN'
-                if id in bpy.data.scenes[0]:
-                    state = bpy.data.scenes[0][id]
-                    if state == "true":
-                        icon = 'TRIA_DOWN'
-                    else:
-                        icon = 'TRIA_RIGHT'
+        state = "false"
+        icon = 'CHECKBOX_DEHLT'
+        split = row.split(factor=0.8)
+        split.label(text=curr.name)
+        if curr.id in obj:
+            state = obj[curr.id]
+            if state == "true":
+               icon = 'CHECKBOX_HLT'
+        split.operator(curr.op_tglbool, text="                ", icon=icon, emboss=False)
 
-                row.operator(stk_utils.generateOpName("screen.stk_tglbool_", curr.fullid, curr.id), text=curr.name, icon=icon, emboss=False)
-                row.label(text=" ") # force the operator to not maximize
-                if state == "true":
-                    if len(curr.subproperties) > 0:
-                        box = layout.box()
-                        self.recursivelyAddProperties(curr.subproperties, box, obj, contextLevel)
+        # Unchecked booleans hide their subproperties
+        if state != "true" or len(curr.subproperties) == 0:
+            return
+
+        if curr.box:
+            box = layout.box()
+            self.recursivelyAddProperties(curr.subproperties, box, obj, contextLevel)
+        else:
+            self.recursivelyAddProperties(curr.subproperties, layout, obj, contextLevel)
+
+    def _draw_color(self, curr, row, layout, obj, contextLevel):
+        row.label(text=curr.name)
+        if curr.id in obj:
+            row.prop(obj, curr.rna_path, text="")
+            row.operator(curr.op_apply_color, text="", icon='COLOR')
+        else:
+            row.operator('screen.stk_missing_props_' + str(contextLevel))
+
+    def _draw_combinable_enum(self, curr, row, layout, obj, contextLevel):
 
-            elif isinstance(curr, stk_utils.StkBoolProperty):
+        row.label(text=curr.name)
 
-                state = "false"
+        if curr.id in obj:
+            curr_val = obj[curr.id]
+
+            for value_id in curr.values:
                 icon = 'CHECKBOX_DEHLT'
-                split = row.split(factor=0.8)
-                split.label(text=curr.name)
-                if id in obj:
-                    state = obj[id]
-                    if state == "true":
-                       icon = 'CHECKBOX_HLT'
-                split.operator(stk_utils.generateOpName("screen.stk_tglbool_", curr.fullid, curr.id), text="                ", icon=icon, emboss=False)
-
-                if state == "true":
-                    if len(curr.subproperties) > 0:
-                        if curr.box:
-                            box = layout.box()
-                            self.recursivelyAddProperties(curr.subproperties, box, obj, contextLevel)
-                        else:
-                            self.recursivelyAddProperties(curr.subproperties, layout, obj, contextLevel)
-
-            elif isinstance(curr, stk_utils.StkColorProperty):
-                row.label(text=curr.name)
-                if curr.id in obj:
-                    row.prop(obj, '["' + curr.id + '"]', text="")
-                    row.operator(stk_utils.generateOpName("screen.stk_apply_color_", curr.fullid, curr.id), text="", icon='COLOR')
-                else:
-                    row.operator('screen.stk_missing_props_' + str(contextLevel))
-
-            elif isinstance(curr, stk_utils.StkCombinableEnumProperty):
-
-                row.label(text=curr.name)
-
-                if curr.id in obj:
-                    curr_val = obj[curr.id]
-
-                    for value_id in curr.values:
-                        icon = 'CHECKBOX_DEHLT'
-                        if value_id in curr_val:
-                            icon = 'CHECKBOX_HLT'
-                        row.operator(stk_utils.generateOpName("screen.stk_set_", curr.fullid, curr.id + "_" + value_id), text=curr.values[value_id].name, icon=icon)
-                else:
-                    row.operator('screen.stk_missing_props_' + str(contextLevel))
-
-            elif isinstance(curr, stk_utils.StkLabelPseudoProperty):
-                row.label(text=curr.name)
-
-            elif isinstance(curr, stk_utils.StkEnumProperty):
-
-                row.label(text=curr.name)
-
-                if id in obj:
-                    curr_value = obj[id]
-                else:
-                    curr_value = ""
-
-                label = curr_value
-                if curr_value in curr.values:
-                    label = curr.values[curr_value].name
-
-                row.menu(curr.menu_operator_name, text=label)
-                #row.operator_menu_enum(curr.getOperatorName(), property="value", text=label)
-
-                if curr_value in curr.values and len(curr.values[curr_value].subproperties) > 0:
-                    box = layout.box()
-                    self.recursivelyAddProperties(curr.values[curr_value].subproperties, box, obj, contextLevel)
-
-            elif isinstance(curr, stk_utils.StkObjectReferenceProperty):
-
-                row.label(text=curr.name)
-
-                if curr.id in obj:
-                    row.prop(obj, '["' + curr.id + '"]', text="")
-                    row.menu(stk_utils.generateOpName("STK_MT_object_menu_", curr.fullid, curr.id), text="", icon='TRIA_DOWN')
-                else:
-                    row.operator('screen.stk_missing_props_' + str(contextLevel))
+                if value_id in curr_val:
+                    icon = 'CHECKBOX_HLT'
+                row.operator(curr.op_set_by_value[value_id], text=curr.values[value_id].name, icon=icon)
+        else:
+            row.operator('screen.stk_missing_props_' + str(contextLevel))
 
-            else:
-                row.label(text=curr.name)
+    def _draw_label(self, curr, row, layout, obj, contextLevel):
+        row.label(text=curr.name)
+
+    def _draw_enum(self, curr, row, layout, obj, contextLevel):
+
+        row.label(text=curr.name)
+
+        if curr.id in obj:
+            curr_value = obj[curr.id]
+        else:
+            curr_value = ""
+
+        label = curr_value
+        if curr_value in curr.values:
+            label = curr.values[curr_value].name
+
+        row.menu(curr.menu_operator_name, text=label)
+        #row.operator_menu_enum(curr.getOperatorName(), property="value", text=label)
 
-                # String or int or float property (Blender chooses the correct widget from the type of the ID-property)
-                if curr.id in obj:
-                    if "min" in dir(curr) and "max" in dir(curr) and curr.min is not None and curr.max is not None:
-                        row.prop(obj, '["' + curr.id + '"]', text="", slider=True)
-                    else:
-                        row.prop(obj, '["' + curr.id + '"]', text="")
-                else:
-                    row.operator('screen.stk_missing_props_' + str(contextLevel))
+        if curr_value in curr.values and len(curr.values[curr_value].subproperties) > 0:
+            box = layout.box()
+            self.recursivelyAddProperties(curr.values[curr_value].subproperties, box, obj, contextLevel)
+
+    def _draw_object_reference(self, curr, row, layout, obj, contextLevel):
+
+        row.label(text=curr.name)
+
+        if curr.id in obj:
+            row.prop(obj, curr.rna_path, text="")
+            row.menu(curr.object_menu_name, text="", icon='TRIA_DOWN')
+        else:
+            row.operator('screen.stk_missing_props_' + str(contextLevel))
+
+    def _draw_default(self, curr, row, layout, obj, contextLevel):
+        row.label(text=curr.name)
+
+        # String or int or float property (Blender chooses the correct widget from the type of the ID-property)
+        if curr.id in obj:
+            if curr.has_slider:
+                row.prop(obj, curr.rna_path, text="", slider=True)
+            else:
+                row.prop(obj, curr.rna_path, text="")
+        else:
+            row.operator('screen.stk_missing_props_' + str(contextLevel))
+
+# Draw method for each property type, looked up by exact type. Types not listed
+# here (StkProperty, StkIntProperty, StkFloatProperty) use PanelBase._draw_default
+_HANDLERS = {
+    stk_utils.StkPropertyGroup: PanelBase._draw_group,
+    stk_utils.StkBoolProperty: PanelBase._draw_bool,
+    stk_utils.StkColorProperty: PanelBase._draw_color,
+    stk_utils.StkCombinableEnumProperty: PanelBase._draw_combinable_enum,
+    stk_utils.StkLabelPseudoProperty: PanelBase._draw_label,
+    stk_utils.StkEnumProperty: PanelBase._draw_enum,
+    stk_utils.StkObjectReferenceProperty: PanelBase._draw_object_reference,
+}
 
 # ==== OBJECT PANEL ====
 class STK_PT_Object_Panel(bpy.types.Panel, PanelBase):
@@ -244,36 +262,31 @@ class STK_PT_Object_Panel(bpy.types.Panel, PanelBase):
     bl_region_type = "WINDOW"
     bl_context = "object"
 
+    @classmethod
+    def poll(cls, context):
+        return context.object is not None
+
     def draw(self, context):
 
         layout = self.layout
-
-        is_track = ("is_stk_track" in context.scene and context.scene["is_stk_track"] == "true")
-        is_node = ("is_stk_node" in context.scene and context.scene["is_stk_node"] == "true")
-        is_kart = ("is_stk_kart" in context.scene and context.scene["is_stk_kart"] == "true")
-
-        if not is_track and not is_kart and not is_node:
-            layout.label(text="(Not a SuperTuxKart scene)")
-            return
-
         obj = context.object
 
+        # Cheap per-object check first, before reading the scene flags
         if obj.proxy is not None:
             layout.label(text="Library nodes cannot be configured here")
             return
 
-        if obj is not None:
-            if is_track or is_node:
-                properties = OrderedDict([])
-                for curr in STK_PER_OBJECT_TRACK_PROPERTIES[1]:
-                    properties[curr.id] = curr
-                self.recursivelyAddProperties(properties, layout, obj, CONTEXT_OBJECT)
+        is_track, is_node, is_kart = stk_utils.getSceneFlags(context.scene)
+
+        if not is_track and not is_kart and not is_node:
+            layout.label(text="(Not a SuperTuxKart scene)")
+            return
 
-            if is_kart:
-                properties = OrderedDict([])
-                for curr in STK_PER_OBJECT_KART_PROPERTIES[1]:
-                    properties[curr.id] = curr
-                self.recursivelyAddProperties(properties, layout, obj, CONTEXT_OBJECT)
+        if is_track or is_node:
+            self.recursivelyAddProperties(STK_TRACK_PROPS_BY_ID, layout, obj, CONTEXT_OBJECT)
+
+        if is_kart:
+            self.recursivelyAddProperties(STK_KART_PROPS_BY_ID, layout, obj, CONTEXT_OBJECT)
 
 
 # ==== SCENE PANEL ====
@@ -288,12 +301,7 @@ class STK_PT_Scene_Panel(bpy.types.Panel, PanelBase):
         obj = context.scene
 
         if obj is not None:
-
-            properties = OrderedDict([])
-            for curr in SCENE_PROPS[1]:
-                properties[curr.id] = curr
-
-            self.recursivelyAddProperties(properties, layout, obj, CONTEXT_SCENE)
+            self.recursivelyAddProperties(SCENE_PROPS_BY_ID, layout, obj, CONTEXT_SCENE)
 
 """
 # ==== IMAGE PANEL ====
@@ -445,39 +453,42 @@ class STK_OT_Add_Object(bpy.types.Operator):
         if self.value == 'light':
             bpy.ops.object.add(type='LIGHT', location=context.scene.cursor.location)
 
-            for curr in bpy.data.objects:
-                if curr.type == 'LIGHT' and curr.select_get():
-                    # FIXME: create associated subproperties if any
-                    curr['type'] = self.value
-                    break
+            # The newly added object becomes the active one
+            curr = context.active_object
+            if curr is None or curr.type != 'LIGHT':
+                return {'CANCELLED'}
+
+            # FIXME: create associated subproperties if any
+            curr['type'] = self.value
         else:
             bpy.ops.object.add(type='EMPTY', location=context.scene.cursor.location)
 
-            for curr in bpy.data.objects:
-                if curr.type == 'EMPTY' and curr.select_get():
-                    # FIXME: create associated subproperties if any
-                    curr['type'] = self.value
+            # The newly added object becomes the active one
+            curr = context.active_object
+            if curr is None or curr.type != 'EMPTY':
+                return {'CANCELLED'}
 
-                    if self.value == 'item':
-                        curr.empty_display_type = 'CUBE'
-                    elif self.value == 'nitro_big' or self.value == 'nitro_small' :
-                        curr.empty_display_type = 'CONE'
-                    elif self.value == 'sfx_emitter':
-                        curr.empty_display_type = 'SPHERE'
+            # FIXME: create associated subproperties if any
+            curr['type'] = self.value
 
-                    for prop in STK_PER_OBJECT_TRACK_PROPERTIES[1]:
-                        if prop.name == "Type":
-                            stk_utils.createProperties(curr, prop.values[self.value].subproperties)
-                            break
+            if self.value == 'item':
+                curr.empty_display_type = 'CUBE'
+            elif self.value == 'nitro_big' or self.value == 'nitro_small' :
+                curr.empty_display_type = 'CONE'
+            elif self.value == 'sfx_emitter':
+                curr.empty_display_type = 'SPHERE'
 
-                    break
+            prop = STK_TRACK_PROPS_BY_NAME.get("Type")
+            if prop is not None:
+                stk_utils.createProperties(curr, prop.values[self.value].subproperties)
 
         return {'FINISHED'}
 
 
 # ======== PREFERENCES ========
 class StkPanelAddonPreferences(bpy.types.AddonPreferences):
-    bl_idname = os.path.basename(os.path.dirname(__file__))
+    __slots__ = ()
+    bl_idname = _ADDON_ID
 
     stk_assets_path: StringProperty(
             name="Assets (data) path",
@@ -495,11 +506,12 @@ class StkPanelAddonPreferences(bpy.types.AddonPreferences):
 
     def draw(self, context):
         layout = self.layout
+        prop = layout.prop
         layout.label(text="The data folder contains folders named 'karts', 'tracks', 'textures', etc.")
-        layout.prop(self, "stk_assets_path")
+        prop(self, "stk_assets_path")
         layout.operator('screen.stk_pick_assets_path', icon='FILEBROWSER', text="Select...")
-        layout.prop(self, "stk_delete_old_files_on_export")
-        layout.prop(self, "stk_export_images")
+        prop(self, "stk_delete_old_files_on_export")
+        prop(self, "stk_export_images")
 
 class STK_FolderPicker_Operator(bpy.types.Operator):
     bl_idname = "screen.stk_pick_assets_path"
@@ -513,9 +525,7 @@ class STK_FolderPicker_Operator(bpy.types.Operator):
 
     def execute(self, context):
         import bpy.path
-        import os.path
-        preferences = context.preferences
-        addon_prefs = preferences.addons[os.path.basename(os.path.dirname(__file__))].preferences
+        addon_prefs = _getAddonPreferences(context)
         addon_prefs.stk_assets_path = os.path.dirname(bpy.path.abspath(self.filepath))
         bpy.ops.wm.save_userpref()
         return {'FINISHED'}
@@ -532,21 +542,22 @@ class STK_PT_Quick_Export_Panel(bpy.types.Panel):
     bl_context = "scene"
 
     def draw(self, context):
-        isNotANode = ('is_stk_node' not in context.scene) or (context.scene['is_stk_node'] != 'true')
+        isNotANode = not stk_utils.getSceneFlags(context.scene)[1]
         layout = self.layout
 
         # ==== Types group ====
         row = layout.row()
 
-        assets_path = context.preferences.addons[os.path.basename(os.path.dirname(__file__))].preferences.stk_assets_path
+        assets_path = _getAddonPreferences(context).stk_assets_path
+        has_assets = bool(assets_path)
 
-        if assets_path is not None and len(assets_path) > 0:
+        if has_assets:
             row.label(text='Assets (data) path: ' + assets_path)
         else:
             row.label(text='Assets (data) path: [please select path]')
         row.operator('screen.stk_pick_assets_path', icon='FILEBROWSER', text="")
 
-        if assets_path is None or len(assets_path) == 0:
+        if not has_assets:
             return
 
         # row = layout.row()
@@ -560,7 +571,6 @@ class STK_PT_Quick_Export_Panel(bpy.types.Panel):
         else:
             row.operator("screen.stk_track_export", text="Export Library Node", icon='GROUP')
 
-        if (assets_path is None or len(assets_path) == 0) \
-            and bpy.context.mode != 'OBJECT':
+        if not has_assets and context.mode != 'OBJECT':
             row.enabled = False
 
@@ -20,7 +20,7 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-import bpy, datetime, sys, os, struct, math, string, re, random, shutil, traceback
+import bpy, datetime, sys, os, struct, math, string, random, shutil, traceback
 from mathutils import *
 from . import stk_utils, stk_panel, stk_track_utils
 
@@ -165,7 +165,7 @@ class TrackExport:
         # If the name contains a ".spm" the model is assumed to be part of
         # the standard objects included in STK, so there is no need to
         # export the model.
-        if re.search("\.spm$", name): return name
+        if name.endswith(".spm"): return name
 
         name = name + ".spm"
         # If the object was already exported, we don't have to do it again.
@@ -24,6 +24,11 @@ import bpy, math, re, random
 from mathutils import *
 from . import stk_utils
 
+# Old models encode placement hints in the name, e.g. "item {z}"
+ITEM_TYPE_SPECS_RE = re.compile("(.*) *{(.*)}")
+# Library paths may use either separator
+PATH_SEPARATOR_RE = re.compile("/|\\\\")
+
 # --------------------------------------------------------------------------
 
 def writeBezierCurve(f, curve, speed, extend="cyclic"):
@@ -89,7 +94,7 @@ class ItemsExporter:
                 else:
                     item_type = obj.name
                 # Portability for old models:
-                g=re.match("(.*) *{(.*)}", item_type)
+                g=ITEM_TYPE_SPECS_RE.match(item_type)
                 if g:
                     item_type = g.group(1)
                     specs = g.group(2).lower()
@@ -223,7 +228,7 @@ class BlenderHairExporter:
                         -hpr[1]*rad2deg, si, si, si)
 
                     if duplicated_obj.proxy is not None and duplicated_obj.proxy.library is not None:
-                        path_parts = re.split("/|\\\\", duplicated_obj.proxy.library.filepath)
+                        path_parts = PATH_SEPARATOR_RE.split(duplicated_obj.proxy.library.filepath)
                         lib_name = path_parts[-2]
                         f.write('  <library name="%s" id=\"%s\" %s/>\n' % (lib_name, duplicated_obj.name, loc_rot_scale_str))
                     else:
@@ -420,7 +425,7 @@ class LibraryNodeExporter:
         import re
         for obj in self.m_objects:
             try:
-                path_parts = re.split("/|\\\\", obj.proxy.library.filepath)
+                path_parts = PATH_SEPARATOR_RE.split(obj.proxy.library.filepath)
                 lib_name = path_parts[-2]
 
                 # origin
@@ -20,8 +20,8 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-import bpy, os, base64, getpass, hashlib, xml.dom.minidom
-from collections import OrderedDict
+import bpy, os, sys, base64, getpass, hashlib, xml.etree.ElementTree
+from functools import lru_cache
 from xml.sax.saxutils import escape
 
 CONTEXT_OBJECT = 0
@@ -47,13 +47,11 @@ def getObject(context, contextLevel):
 # is not set. If set_value_if_undefined is set and the property is not
 # defined, this function will also set the property to this default value.
 def getSceneProperty(scene, name, default="", set_value_if_undefined=1):
-    import traceback
     try:
         prop = scene[name]
         if isinstance(prop, str):
-            # + "" is used to force a copy of the string AND to convert from binary format to string format
             # escape formats the string for XML
-            return (escape(prop + "") + "").encode('ascii', 'xmlcharrefreplace').decode("ascii")
+            return escape(prop).encode('ascii', 'xmlcharrefreplace').decode("ascii")
         else:
             return prop
     except:
@@ -61,6 +59,14 @@ def getSceneProperty(scene, name, default="", set_value_if_undefined=1):
             scene[name] = default
     return default
 
+# ------------------------------------------------------------------------------
+# Returns the (is_track, is_node, is_kart) flags of a scene, telling which kind
+# of SuperTuxKart asset is being edited.
+def getSceneFlags(scene):
+    return (scene.get("is_stk_track") == "true",
+            scene.get("is_stk_node") == "true",
+            scene.get("is_stk_kart") == "true")
+
 # ------------------------------------------------------------------------------
 # Gets a custom property of an object
 def getObjectProperty(obj, name, default=""):
@@ -80,11 +86,10 @@ def getObjectProperty(obj, name, default=""):
 # is not set. If set_value_if_undefined is set and the property is not
 # defined, this function will also set the property to this default value.
 def getIdProperty(obj, name, default="", set_value_if_undefined=1):
-    import traceback
     try:
         prop = obj[name]
         if isinstance(prop, str):
-            return obj[name].replace('&', '&amp;') # this is XML
+            return prop.replace('&', '&amp;') # this is XML
         else:
             return prop
     except:
@@ -154,7 +159,11 @@ def getXYZHPRString(obj):
     return s
 
 def selectObjectsInList(obj_list):
-    bpy.ops.object.select_all(action='DESELECT')
+    # Deselect directly rather than through bpy.ops.object.select_all, which
+    # goes through the operator machinery (context copy, poll, undo push)
+    for obj in bpy.context.view_layer.objects:
+        if obj.select_get():
+            obj.select_set(False)
     for obj in obj_list:
         if not obj.select_get():
             obj.select_set(True)
@@ -165,15 +174,15 @@ def searchNodeTreeForImage(node_tree, uv_num):
     if node_tree is not None:
         try:
             image_name = ""
-            shader_node = node_tree.nodes['Principled BSDF']
-            if shader_node.inputs['Base Color'].is_linked:
+            base_color = node_tree.nodes['Principled BSDF'].inputs['Base Color']
+            if base_color.is_linked:
                 # Get the connected node
-                child = shader_node.inputs['Base Color'].links[0].from_node
+                child = base_color.links[0].from_node
                 if type(child) is bpy.types.ShaderNodeTexImage and uv_num == 1:
                     image_name = os.path.basename(child.image.filepath)
                 elif type(child) is bpy.types.ShaderNodeMixRGB:
-                    uvOne = child.links['Color1'].from_node
-                    uvTwo = child.links['Color2'].from_node
+                    uvOne = child.inputs['Color1'].links[0].from_node
+                    uvTwo = child.inputs['Color2'].links[0].from_node
                     if type(uvOne) is bpy.types.ShaderNodeTexImage and uv_num == 1:
                         image_name = os.path.basename(uvOne.image.filepath)
                     if type(uvTwo) is bpy.types.ShaderNodeTexImage and uv_num == 2:
@@ -199,79 +208,79 @@ def createProperties(object, props):
     if not "_RNA_UI" in object:
         object["_RNA_UI"] = {}
 
-    for p in props.keys():
+    for p, prop in props.items():
 
-        if isinstance(props[p], StkLabelPseudoProperty):
+        if isinstance(prop, StkLabelPseudoProperty):
             continue
 
-        elif isinstance(props[p], StkPropertyGroup):
-            createProperties(object, props[p].subproperties)
+        elif isinstance(prop, StkPropertyGroup):
+            createProperties(object, prop.subproperties)
 
         elif not p in object:
 
             # create property by setting default value
-            v = props[p].default
+            v = prop.default
             object[p] = v
 
-            if isinstance(props[p], StkEnumProperty):
-                if v in props[p].values:
-                    createProperties(object, props[p].values[v].subproperties)
-            elif isinstance(props[p], StkBoolProperty):
+            if isinstance(prop, StkEnumProperty):
+                if v in prop.values:
+                    createProperties(object, prop.values[v].subproperties)
+            elif isinstance(prop, StkBoolProperty):
                 if v == "true":
-                    createProperties(object, props[p].subproperties)
+                    createProperties(object, prop.subproperties)
 
         # check the property has the right type
-        elif isinstance(props[p], StkFloatProperty) :
+        elif isinstance(prop, StkFloatProperty) :
 
             if not isinstance(object[p], float):
                 try:
                     object[p] = float(object[p])
                 except:
-                    object[p] = props[p].default
+                    object[p] = prop.default
 
-        elif isinstance(props[p], StkIntProperty):
+        elif isinstance(prop, StkIntProperty):
 
             if not isinstance(object[p], int):
                 try:
                     object[p] = int(object[p])
                 except:
-                    object[p] = props[p].default
+                    object[p] = prop.default
 
-        elif isinstance(props[p], StkProperty) and not isinstance(object[p], str):
+        elif isinstance(prop, StkProperty) and not isinstance(object[p], str):
             try:
                 object[p] = str(object[p])
             except:
-                object[p] = props[p].default
+                object[p] = prop.default
 
 
         rna_ui_dict = {}
         try:
-            rna_ui_dict["description"] = props[p].doc
+            rna_ui_dict["description"] = prop.doc
         except:
             pass
 
         try:
-            if props[p].min is not None:
-                rna_ui_dict["min"] = props[p].min
-                rna_ui_dict["soft_min"] = rops[p].min
+            if prop.min is not None:
+                rna_ui_dict["min"] = prop.min
+                rna_ui_dict["soft_min"] = prop.min
         except:
             pass
 
         try:
-            if props[p].max is not None:
-                rna_ui_dict["max"] = props[p].max
-                rna_ui_dict["soft_max"] = props[p].max
+            if prop.max is not None:
+                rna_ui_dict["max"] = prop.max
+                rna_ui_dict["soft_max"] = prop.max
         except:
             pass
 
         object["_RNA_UI"][p] = rna_ui_dict
 
-        if isinstance(props[p], StkEnumProperty):
-            if object[p] in props[p].values:
-                createProperties(object, props[p].values[object[p]].subproperties)
-        elif isinstance(props[p], StkBoolProperty):
+        if isinstance(prop, StkEnumProperty):
+            if object[p] in prop.values:
+                createProperties(object, prop.values[object[p]].subproperties)
+        elif isinstance(prop, StkBoolProperty):
             if object[p] == "true":
-                createProperties(object, props[p].subproperties)
+                createProperties(object, prop.subproperties)
 
 
 def simpleHash(x):
@@ -279,6 +288,9 @@ def simpleHash(x):
     m.update(x.encode('ascii'))
     return base64.b64encode(m.digest()).decode('ascii').replace('=', '').replace('/', '_').replace('+', '_').lower()[0:15]
 
+# Operator names are requested for every property on every panel redraw; the
+# set of (prefix, fullid, id) combinations is fixed once the XML files are loaded
+@lru_cache(maxsize=None)
 def generateOpName(prefix, fullid, id):
     if len(prefix + fullid + '_' + id) > 60:
         return prefix + simpleHash(fullid) + '_' + id
@@ -289,12 +301,18 @@ def generateOpName(prefix, fullid, id):
 #! The base class for all properties.
 #! If you use this property directly (and not a subclass), you get a simple text box
 class StkProperty:
+    __slots__ = ('name', 'id', 'fullid', 'default', 'doc', 'rna_path', 'has_slider')
+
     def __init__(self, id, name, default, fullid, doc="(No documentation was defined for this item)"):
         self.name = name
         self.id = id
         self.fullid = fullid
         self.default = default
         self.doc = doc
+        # Path used to display the id-property in the UI
+        self.rna_path = '["' + id + '"]'
+        # True when the property has both bounds and is shown as a slider
+        self.has_slider = False
 
 
 # ------------------------------------------------------------------------------
@@ -316,6 +334,7 @@ class StkProperty:
 #! obj_text         a lambda taking arguments "self" and "object", and that returns
 #!                  the user-visible string to apear in the dropdown for an object
 class StkObjectReferenceProperty(StkProperty):
+    __slots__ = ('object_menu_name',)
 
     def __init__(self, id, fullid, name, contextLevel, default, filter, doc="Select an object",
                  static_objects=[],
@@ -347,6 +366,7 @@ class StkObjectReferenceProperty(StkProperty):
         bpy.utils.register_class(SelectObjectOperator)
 
         op_name = generateOpName("STK_MT_object_menu_", fullid, id)
+        self.object_menu_name = op_name
         class ObjectPickerMenu(bpy.types.Menu):
             m_filter = filter
             m_obj_identifier = obj_identifier
@@ -382,6 +402,7 @@ class StkObjectReferenceProperty(StkProperty):
 # ------------------------------------------------------------------------------
 #! One entry in a StkEnumProperty
 class StkEnumChoice:
+    __slots__ = ('name', 'id', 'fullid', 'subproperties', 'doc')
 
     #! @param name          User-visible name for this property
     #! @param subproperties A list of StkProperty's. Contains the properties
@@ -391,9 +412,7 @@ class StkEnumChoice:
         self.id = id
         self.fullid = fullid
 
-        self.subproperties = OrderedDict([])
-        for curr in subproperties:
-            self.subproperties[curr.id] = curr
+        self.subproperties = {curr.id: curr for curr in subproperties}
 
         self.doc = doc
 
@@ -407,6 +426,7 @@ class StkEnumChoice:
 #! contextLevel     object, scene, material level?
 #! default          default value for this property
 class StkEnumProperty(StkProperty):
+    __slots__ = ('values', 'operator_name', 'menu_operator_name')
 
     def getOperatorName(self):
         return self.operator_name
@@ -497,6 +517,7 @@ class StkEnumProperty(StkProperty):
 #! contextLevel     object, scene, material level?
 #! default          default value for this property
 class StkCombinableEnumProperty(StkProperty):
+    __slots__ = ('values', 'op_set_by_value')
 
     #! @param name   User-visible name for this property
     #! @param values A dictionnary of type { 'value' : StkEnumChoice(...) }
@@ -512,11 +533,17 @@ class StkCombinableEnumProperty(StkProperty):
             curr_obj = values[curr_val]
             values_for_blender.append( curr_val )
 
+        # Name of the operator toggling each value
+        self.op_set_by_value = {}
+
         for curr in values_for_blender:
+            op_set = generateOpName("screen.stk_set_", fullid, id + "_" + curr)
+            self.op_set_by_value[curr] = op_set
+
             # Create operator for this combo
             class STK_SetEnumComboValue(bpy.types.Operator):
 
-                bl_idname = generateOpName("screen.stk_set_", fullid, id + "_" + curr)
+                bl_idname = op_set
                 bl_label  = ("SuperTuxKart set " + id + " = " + curr)
 
                 if values[curr].doc is not None:
@@ -555,6 +582,7 @@ class StkCombinableEnumProperty(StkProperty):
 # ------------------------------------------------------------------------------
 #! A pseudo-property that only displays some text
 class StkLabelPseudoProperty(StkProperty):
+    __slots__ = ()
 
     def __init__(self, id, name, default=0.0, doc="(No documentation defined for this element)", fullid="", min = None, max = None):
         super(StkLabelPseudoProperty, self).__init__(id=id, name=name, default=default, fullid=fullid)
@@ -572,6 +600,7 @@ class StkLabelPseudoProperty(StkProperty):
 #! min              minimum accepted value
 #! max              maximum accepted value
 class StkFloatProperty(StkProperty):
+    __slots__ = ('min', 'max')
 
     #! @param name   User-visible name for this property
     def __init__(self, id, name, default=0.0, doc="(No documentation defined for this element)", fullid="", min = None, max = None):
@@ -580,6 +609,7 @@ class StkFloatProperty(StkProperty):
         self.doc = doc
         self.min = min
         self.max = max
+        self.has_slider = min is not None and max is not None
 
 
 # ------------------------------------------------------------------------------
@@ -592,6 +622,7 @@ class StkFloatProperty(StkProperty):
 #! min              minimum accepted value
 #! max              maximum accepted value
 class StkIntProperty(StkProperty):
+    __slots__ = ('min', 'max')
 
     #! @param name   User-visible name for this property
     def __init__(self, id, name, default=0, doc="(No documentation defined for this element)", fullid="", min=None, max=None):
@@ -599,9 +630,11 @@ class StkIntProperty(StkProperty):
         self.doc = doc
         self.min = min
         self.max = max
+        self.has_slider = min is not None and max is not None
 
 # ------------------------------------------------------------------------------
 class StkPropertyGroup(StkProperty):
+    __slots__ = ('contextLevel', 'subproperties', 'op_tglbool')
 
     #! A floating-point property
     def __init__(self, id, name, contextLevel, default="false", subproperties=[], fullid="", doc="(No documentation defined for this element)"):
@@ -609,17 +642,16 @@ class StkPropertyGroup(StkProperty):
 
         self.contextLevel = contextLevel
 
-        self.subproperties = OrderedDict([])
-        for curr in subproperties:
-            self.subproperties[curr.id] = curr
+        self.subproperties = {curr.id: curr for curr in subproperties}
 
         self.doc = doc
+        self.op_tglbool = generateOpName("screen.stk_tglbool_", fullid, id)
         super_self = self
 
         # Create operator for this bool
         class STK_TogglePropGroupValue(bpy.types.Operator):
 
-            bl_idname = generateOpName("screen.stk_tglbool_", fullid, id)
+            bl_idname = super_self.op_tglbool
             bl_label  = ("SuperTuxKart toggle " + id)
             __doc__ = doc
 
@@ -671,9 +703,7 @@ class StkPropertyGroup(StkProperty):
 #!                      displayed in a box
 #! doc                  documentation shown to the user in a tooltip
 class StkBoolProperty(StkProperty):
-
-    # (self, id, name, values, default):
-    box = True
+    __slots__ = ('box', 'contextLevel', 'subproperties', 'op_tglbool')
 
     #! A floating-point property
     def __init__(self, id, name, contextLevel, default="false", subproperties=[], box = True, fullid="", doc="(No documentation defined for this element)"):
@@ -682,17 +712,16 @@ class StkBoolProperty(StkProperty):
         self.box = box
         self.contextLevel = contextLevel
 
-        self.subproperties = OrderedDict([])
-        for curr in subproperties:
-            self.subproperties[curr.id] = curr
+        self.subproperties = {curr.id: curr for curr in subproperties}
 
         self.doc = doc
+        self.op_tglbool = generateOpName("screen.stk_tglbool_", fullid, id)
         super_self = self
 
         # Create operator for this bool
         class STK_ToggleBoolValue(bpy.types.Operator):
 
-            bl_idname = generateOpName("screen.stk_tglbool_", fullid, id)
+            bl_idname = super_self.op_tglbool
             bl_label  = ("SuperTuxKart toggle " + id)
             __doc__ = doc
 
@@ -738,16 +767,20 @@ class StkBoolProperty(StkProperty):
 #! default          default value for this property
 #! doc              documentation shown to the user in a tooltip
 class StkColorProperty(StkProperty):
+    __slots__ = ('op_apply_color',)
 
     #! A floating-point property
     def __init__(self, id, name, contextLevel, default="255 255 255", fullid="", doc="(No documentation defined for this item)"):
         super(StkColorProperty, self).__init__(id=id, name=name, default=default, fullid=fullid)
 
+        op_apply_color = generateOpName("screen.stk_apply_color_", fullid, id)
+        self.op_apply_color = op_apply_color
+
         #! Color picker operator (TODO: this operator is mostly for backwards compatibility with our
         #                               blend files that come from 2.4; blender 2.5 has a color property
         #                               type we could use)
         class Apply_Color_Operator(bpy.types.Operator):
-            bl_idname = generateOpName("screen.stk_apply_color_", fullid, id)
+            bl_idname = op_apply_color
             bl_label = ("Apply Color")
             __doc__ = doc
 
@@ -798,7 +831,6 @@ class StkColorProperty(StkProperty):
                 try:
                     row.template_color_picker(self, "temp_color", value_slider=True, cubic=False)
                 except Exception as ex:
-                    import sys
                     print("Except :(", type(ex), ex, "{",ex.args,"}")
                     pass
 
@@ -821,203 +853,196 @@ class StkColorProperty(StkProperty):
 #                                  THE PROPERTIES
 # ------------------------------------------------------------------------------
 
+# ------------------------------------------------------------------------------
+#! Compiles a Python expression found in an XML attribute (filter lambdas and
+#! the like). Many object reference properties share the same expression, so
+#! each distinct source string is only compiled once.
+@lru_cache(maxsize=None)
+def compileExpression(source):
+    return compile(source, "<stkdata>", "eval")
+
+# Globals the XML expressions are evaluated with. The expressions only define
+# lambdas and never assign globals, so one dictionary is shared by all of them.
+EXPRESSION_GLOBALS = {}
+
 def readEnumValues(valueNodes, contextLevel, idprefix):
-    import collections
-    out = collections.OrderedDict()
+    out = dict()
 
     for node in valueNodes:
-        if node.localName == None:
-            continue
-        elif node.localName == "EnumChoice":
+        if node.tag == "EnumChoice":
+            attrs = node.attrib
+            id = sys.intern(attrs.get("id", ""))
+            fullid = idprefix + '_' + id
             args = dict()
-            args["id"] = node.getAttribute("id")
-            args["fullid"] = idprefix + '_' + node.getAttribute("id")
-            args["name"] = node.getAttribute("label")
-            args["subproperties"] = parseProperties(node, contextLevel, idprefix + '_' + node.getAttribute("id"))
+            args["id"] = id
+            args["fullid"] = fullid
+            args["name"] = attrs.get("label", "")
+            args["subproperties"] = parseProperties(node, contextLevel, fullid)
 
-            if node.hasAttribute("doc"):
-                args["doc"] = node.getAttribute("doc")
+            if "doc" in attrs:
+                args["doc"] = attrs["doc"]
 
-            out[node.getAttribute("id")] = StkEnumChoice(**args)
+            out[id] = StkEnumChoice(**args)
         else:
-            print("INTERNAL ERROR : Unexpected tag " + str(node.localName) + " in enum '" + str(node.localName) + "'")
+            print("INTERNAL ERROR : Unexpected tag " + str(node.tag) + " in enum '" + str(node.tag) + "'")
 
     return out
 
-def parseProperties(node, contextLevel, idprefix):
+#! Reads the attributes shared by all property nodes (id, name and, if
+#! with_doc is set, the optional doc) into a dictionary of constructor arguments
+def propertyArgs(attrs, idprefix, with_doc=True):
+    # Ids are used as lookup keys for the scene/object custom properties
+    id = sys.intern(attrs.get("id", ""))
+    args = dict()
+    args["id"] = id
+    args["fullid"] = idprefix + '_' + id
+    args["name"] = attrs.get("name", "")
 
-    props = []
+    if with_doc and "doc" in attrs:
+        args["doc"] = attrs.get("doc", "")
 
-    for e in node.childNodes:
-        if e.localName == None:
-            continue
+    return args
 
-        elif e.localName == "StringProp":
-            defaultval = e.getAttribute("default")
-            if defaultval == "$user":
-                defaultval = getpass.getuser()
+# ------------------------------------------------------------------------------
+# One parser per property tag; each takes the XML element, its attributes, the
+# context level and the id prefix, and returns the constructed property
 
-            if e.hasAttribute("doc"):
-                props.append(StkProperty(id=e.getAttribute("id"), fullid=idprefix+'_'+e.getAttribute("id"),
-                                         name=e.getAttribute("name"), default=defaultval,
-                                         doc=e.getAttribute("doc")))
-            else:
-                props.append(StkProperty(id=e.getAttribute("id"), fullid=idprefix+'_'+e.getAttribute("id"),
-                                         name=e.getAttribute("name"), default=defaultval))
+def parseStringProp(e, attrs, contextLevel, idprefix):
+    args = propertyArgs(attrs, idprefix)
+    args["default"] = attrs.get("default", "")
+    if args["default"] == "$user":
+        args["default"] = getpass.getuser()
 
-        elif e.localName == "EnumProp":
+    return StkProperty(**args)
 
-            args = dict()
-            args["id"] = e.getAttribute("id")
-            args["fullid"] = idprefix + '_' + e.getAttribute("id")
-            args["name"] = e.getAttribute("name")
-            args["default"] = e.getAttribute("default")
+def parseEnumProp(e, attrs, contextLevel, idprefix):
+    args = propertyArgs(attrs, idprefix)
+    args["default"] = attrs.get("default", "")
 
-            #if e.hasAttribute("unique_prefix"):
-            #    args["unique_prefix"] = e.getAttribute("unique_prefix")
+    #if "unique_prefix" in attrs:
+    #    args["unique_prefix"] = attrs.get("unique_prefix", "")
 
-            if e.hasAttribute("doc"):
-                args["doc"] = e.getAttribute("doc")
+    args["values"] = readEnumValues(e, contextLevel, args["fullid"])
+    args["contextLevel"] = contextLevel
 
-            args["values"] = readEnumValues(e.childNodes, contextLevel, args["fullid"])
-            args["contextLevel"] = contextLevel
+    return StkEnumProperty(**args)
 
-            props.append(StkEnumProperty(**args))
+def parseCombinableEnumProp(e, attrs, contextLevel, idprefix):
+    args = propertyArgs(attrs, idprefix, with_doc=False)
+    args["default"] = attrs.get("default", "")
 
-        elif e.localName == "CombinableEnumProp":
+    #if "unique_prefix" in attrs:
+    #    args["unique_prefix"] = attrs.get("unique_prefix", "")
 
-            args = dict()
-            args["id"] = e.getAttribute("id")
-            args["fullid"] = idprefix + '_' + e.getAttribute("id")
-            args["name"] = e.getAttribute("name")
-            args["default"] = e.getAttribute("default")
+    args["values"] = readEnumValues(e, contextLevel, args["fullid"])
+    args["contextLevel"] = contextLevel
 
-            #if e.hasAttribute("unique_prefix"):
-            #    args["unique_prefix"] = e.getAttribute("unique_prefix")
+    return StkCombinableEnumProperty(**args)
 
-            args["values"] = readEnumValues(e.childNodes, contextLevel, args["fullid"])
-            args["contextLevel"] = contextLevel
+def parseIntProp(e, attrs, contextLevel, idprefix):
+    args = propertyArgs(attrs, idprefix)
+    args["default"] = int(attrs.get("default", ""))
 
-            props.append(StkCombinableEnumProperty(**args))
+    if "min" in attrs:
+        args["min"] = int(attrs["min"])
+    if "max" in attrs:
+        args["max"] = int(attrs["max"])
 
-        elif e.localName == "IntProp":
-            if e.hasAttribute("doc"):
-                props.append(StkIntProperty(id=e.getAttribute("id"), fullid = idprefix + '_' + e.getAttribute("id"),
-                                            name=e.getAttribute("name"), default=int(e.getAttribute("default")),
-                                            doc=e.getAttribute("doc")))
-            else:
-                props.append(StkIntProperty(id=e.getAttribute("id"), fullid = idprefix + '_' + e.getAttribute("id"),
-                                            name=e.getAttribute("name"), default=int(e.getAttribute("default"))))
+    return StkIntProperty(**args)
 
-        elif e.localName == "FloatProp":
-            args = dict()
-            args["id"] = e.getAttribute("id")
-            args["fullid"] = idprefix + '_' + e.getAttribute("id")
-            args["name"] = e.getAttribute("name")
-            args["default"] = float(e.getAttribute("default"))
+def parseFloatProp(e, attrs, contextLevel, idprefix):
+    args = propertyArgs(attrs, idprefix)
+    args["default"] = float(attrs.get("default", ""))
 
-            if e.hasAttribute("doc"):
-                args["doc"] = e.getAttribute("doc")
-            if e.hasAttribute("min"):
-                args["min"] = float(e.getAttribute("min"))
-            if e.hasAttribute("max"):
-                args["max"] = float(e.getAttribute("max"))
+    if "min" in attrs:
+        args["min"] = float(attrs["min"])
+    if "max" in attrs:
+        args["max"] = float(attrs["max"])
 
-            props.append(StkFloatProperty(**args))
+    return StkFloatProperty(**args)
 
-        elif e.localName == "LabelProp":
-            args = dict()
-            args["id"] = e.getAttribute("id")
-            args["fullid"] = idprefix + '_' + e.getAttribute("id")
-            args["name"] = e.getAttribute("name")
-            args["default"] = None
+def parseLabelProp(e, attrs, contextLevel, idprefix):
+    args = propertyArgs(attrs, idprefix)
+    args["default"] = None
 
-            if e.hasAttribute("doc"):
-                args["doc"] = e.getAttribute("doc")
+    return StkLabelPseudoProperty(**args)
 
-            props.append(StkLabelPseudoProperty(**args))
+def parseColorProp(e, attrs, contextLevel, idprefix):
+    args = propertyArgs(attrs, idprefix)
+    args["default"] = attrs.get("default", "")
+    args["contextLevel"] = contextLevel
 
-        elif e.localName == "ColorProp":
-            if e.hasAttribute("doc"):
-                props.append(StkColorProperty(id=e.getAttribute("id"), fullid=idprefix + '_' + e.getAttribute("id"),
-                                              name=e.getAttribute("name"), default=e.getAttribute("default"),
-                                              doc=e.getAttribute("doc"), contextLevel=contextLevel))
-            else:
-                props.append(StkColorProperty(id=e.getAttribute("id"), fullid=idprefix + '_' + e.getAttribute("id"),
-                                              name=e.getAttribute("name"), default=e.getAttribute("default"),
-                                              contextLevel=contextLevel))
+    return StkColorProperty(**args)
 
-        elif e.localName == "PropGroup":
+def parsePropGroup(e, attrs, contextLevel, idprefix):
+    args = propertyArgs(attrs, idprefix, with_doc=False)
+    args["subproperties"] = parseProperties(e, contextLevel, args["fullid"])
+    args["contextLevel"] = contextLevel
 
-            args = dict()
-            args["id"] = e.getAttribute("id")
-            args["fullid"] = idprefix + '_' + e.getAttribute("id")
-            args["name"] = e.getAttribute("name")
-            args["subproperties"] = parseProperties(e, contextLevel, args["fullid"])
-            args["contextLevel"] = contextLevel
-            p = StkPropertyGroup(**args)
-            props.append(p)
+    return StkPropertyGroup(**args)
 
-        elif e.localName == "BoolProp":
+def parseBoolProp(e, attrs, contextLevel, idprefix):
+    args = propertyArgs(attrs, idprefix)
+    args["default"] = attrs.get("default", "")
+    args["subproperties"] = parseProperties(e, contextLevel, args["fullid"])
+    args["contextLevel"] = contextLevel
 
-            args = dict()
-            args["id"] = e.getAttribute("id")
-            args["fullid"] = idprefix + '_' + e.getAttribute("id")
-            args["name"] = e.getAttribute("name")
-            args["default"] = e.getAttribute("default")
-            args["subproperties"] = parseProperties(e, contextLevel, args["fullid"])
-            args["contextLevel"] = contextLevel
+    if "box" in attrs:
+        args["box"] = bool(attrs["box"])
 
-            if e.hasAttribute("doc"):
-                args["doc"] = e.getAttribute("doc")
+    return StkBoolProperty(**args)
 
-            if e.hasAttribute("box"):
-                args["box"] = bool(e.getAttribute("box"))
+def parseObjRefProp(e, attrs, contextLevel, idprefix):
+    args = propertyArgs(attrs, idprefix)
+    args["default"] = attrs.get("default", "")
+    args["contextLevel"] = contextLevel
 
-            props.append(StkBoolProperty(**args))
+    args["filter"] = eval(compileExpression(attrs.get("filter", "")), EXPRESSION_GLOBALS)
 
-        elif e.localName == "ObjRefProp":
-            args = dict()
-            args["id"] = e.getAttribute("id")
-            args["fullid"] = idprefix + '_' + e.getAttribute("id")
-            args["name"] = e.getAttribute("name")
-            args["default"] = e.getAttribute("default")
-            args["contextLevel"] = contextLevel
+    if "static_objects" in attrs:
+        args["static_objects"] = eval(compileExpression(attrs["static_objects"]), EXPRESSION_GLOBALS)
 
-            global_env = {}
-            local_env = {}
-            exec("filterFn = " + e.getAttribute("filter"), global_env, local_env)
-            args["filter"] = local_env["filterFn"]
+    #if "unique_id_suffix" in attrs:
+    #    args["unique_id_suffix"] = attrs.get("unique_id_suffix", "")
 
-            if e.hasAttribute("static_objects"):
-                exec("static_objects_fn = " + e.getAttribute("static_objects"), global_env, local_env)
-                args["static_objects"] = local_env["static_objects_fn"]
+    if "obj_identifier" in attrs:
+        args["obj_identifier"] = eval(compileExpression(attrs["obj_identifier"]), EXPRESSION_GLOBALS)
 
-            if e.hasAttribute("doc"):
-                args["doc"] = e.getAttribute("doc")
+    if "obj_text" in attrs:
+        args["obj_text"] = eval(compileExpression(attrs["obj_text"]), EXPRESSION_GLOBALS)
 
-            #if e.hasAttribute("unique_id_suffix"):
-            #    args["unique_id_suffix"] = e.getAttribute("unique_id_suffix")
+    return StkObjectReferenceProperty(**args)
 
-            if e.hasAttribute("obj_identifier"):
-                exec("obj_identifier_fn = " + e.getAttribute("obj_identifier"), global_env, local_env)
-                args["obj_identifier"] = local_env["obj_identifier_fn"]
+PROPERTY_PARSERS = {
+    "StringProp": parseStringProp,
+    "EnumProp": parseEnumProp,
+    "CombinableEnumProp": parseCombinableEnumProp,
+    "IntProp": parseIntProp,
+    "FloatProp": parseFloatProp,
+    "LabelProp": parseLabelProp,
+    "ColorProp": parseColorProp,
+    "PropGroup": parsePropGroup,
+    "BoolProp": parseBoolProp,
+    "ObjRefProp": parseObjRefProp,
+}
 
-            if e.hasAttribute("obj_text"):
-                exec("obj_text_fn = " + e.getAttribute("obj_text"), global_env, local_env)
-                args["obj_text"] = local_env["obj_text_fn"]
+def parseProperties(node, contextLevel, idprefix):
+
+    props = []
 
-            props.append(StkObjectReferenceProperty(**args))
+    for e in node:
+        parser = PROPERTY_PARSERS.get(e.tag)
+        if parser is not None:
+            props.append(parser(e, e.attrib, contextLevel, idprefix))
 
     return props
 
 def getPropertiesFromXML(filename, contextLevel):
     import os
     idprefix = os.path.splitext(os.path.basename(filename))[0]
-    node = xml.dom.minidom.parse(filename)
-    for curr in node.childNodes:
-        if curr.localName == "Properties":
-            return [curr.getAttribute("bl-label"), parseProperties(curr, contextLevel, idprefix)]
+    root = xml.etree.ElementTree.parse(filename).getroot()
+    if root.tag == "Properties":
+        return [root.get("bl-label", ""), parseProperties(root, contextLevel, idprefix)]
     raise RuntimeError("No <Properties> node in " + filename)
 
 def getDataPath(start):